@@ -4,7 +4,7 @@ Lightweight backend for the job application tracker.
 Usage:
     python backend.py
 
-This starts a simple HTTP server with JSON endpoints:
+This starts a threaded HTTP server with JSON endpoints:
     POST   /api/auth/login          -> login (body: JSON name, pin, optional location)
     GET    /api/applications        -> list applications (requires X-User-Token)
     POST   /api/applications        -> create application (requires X-User-Token)
@@ -16,36 +16,159 @@ This starts a simple HTTP server with JSON endpoints:
     GET    /api/admin/events        -> admin event log (requires X-Admin-Token)
 
 Data is persisted in `data/applications.json`.
-No external dependencies are required (standard library only).
+Requires pymongo and orjson (see requirements.txt).
 """
 
 from __future__ import annotations
 
-import json
 import os
 import re
 import time
 import hashlib
 import secrets
+import threading
 
+from email.utils import formatdate
+from http import HTTPStatus
 from urllib.parse import parse_qs, urlparse
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from typing import Dict, List, Optional, Tuple
-from pymongo import MongoClient, ASCENDING, ReturnDocument
-from pymongo.errors import PyMongoError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+import orjson
+from pymongo import MongoClient, ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import CollectionInvalid, OperationFailure, PyMongoError
+from pymongo.write_concern import WriteConcern
 
 MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017")
 MONGO_DB = os.environ.get("MONGO_DB", "tracker")
 # Single admin credential; defaults to the trackeradmin password if env not provided.
 ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "9087700234")
+ADMIN_TOKEN_BYTES = ADMIN_TOKEN.encode("utf-8")
 PIN_SALT = os.environ.get("PIN_SALT", "tracker-salt")
+PIN_HASH_ITERATIONS = 200_000
+PIN_HASH_PREFIX = "pbkdf2_sha256$"
 
-mongo_client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=2000)
+try:
+    MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", "50"))
+except ValueError:
+    MONGO_MAX_POOL_SIZE = 50
+
+# MongoClient is thread-safe; its pool bounds how many handler threads hit Mongo at once.
+mongo_client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=2000, maxPoolSize=MONGO_MAX_POOL_SIZE)
 db = mongo_client[MONGO_DB]
 users_col = db["users"]
 apps_col = db["applications"]
 events_col = db["events"]
 counters_col = db["counters"]
+# Fire-and-forget handles for telemetry writes (event log, lastSeen); losing one is acceptable.
+TELEMETRY_WRITE_CONCERN = WriteConcern(w=0)
+events_col_fast = events_col.with_options(write_concern=TELEMETRY_WRITE_CONCERN)
+users_col_fast = users_col.with_options(write_concern=TELEMETRY_WRITE_CONCERN)
+
+HTTP_VERSION = "HTTP/1.0"
+STATUS_LINES = {
+    status.value: f"{HTTP_VERSION} {status.value} {status.phrase}\r\n".encode("latin-1") for status in HTTPStatus
+}
+# Headers shared by every response, assembled once instead of per send_header call.
+CORS_HEADERS = (
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Access-Control-Allow-Methods: GET,POST,PUT,DELETE,OPTIONS\r\n"
+    b"Access-Control-Allow-Headers: Content-Type, X-Admin-Token, X-User-Token\r\n"
+)
+JSON_HEADERS = b"Content-Type: application/json\r\n" + CORS_HEADERS
+# CORS preflight reply only varies by Date, so the rest is prebuilt.
+OPTIONS_HEADERS = CORS_HEADERS + b"Content-Length: 0\r\n\r\n"
+
+# Projections limit reads to the fields each endpoint actually returns.
+USER_PAYLOAD_PROJECTION = {"name": 1, "location": 1, "createdAt": 1, "lastLogin": 1, "lastSeen": 1, "pinHash": 1}
+AUTH_USER_PROJECTION = {"_id": 1, "name": 1}
+ADMIN_EVENT_PROJECTION = {"_id": 0, "type": 1, "owner": 1, "timestamp": 1}
+# Excluding _id server-side means documents can be serialized as they arrive.
+APPLICATION_PROJECTION = {"_id": 0}
+
+# Admin user listing in one round-trip: per-user application counts via $lookup,
+# plus a trailing summary document with overall and unassigned totals.
+# The $lookup counts server-side so application bodies are never copied into user docs.
+ADMIN_USERS_PIPELINE = [
+    {
+        "$lookup": {
+            "from": "applications",
+            "let": {"name": "$name"},
+            "pipeline": [{"$match": {"$expr": {"$eq": ["$owner", "$$name"]}}}, {"$count": "n"}],
+            "as": "apps",
+        }
+    },
+    {
+        "$project": {
+            **USER_PAYLOAD_PROJECTION,
+            "_id": 0,
+            "totalApplications": {"$ifNull": [{"$arrayElemAt": ["$apps.n", 0]}, 0]},
+        }
+    },
+    {
+        "$unionWith": {
+            "coll": "applications",
+            "pipeline": [
+                {
+                    "$group": {
+                        "_id": None,
+                        "totalApplications": {"$sum": 1},
+                        "unassignedApplications": {
+                            "$sum": {"$cond": [{"$eq": [{"$ifNull": ["$owner", ""]}, ""]}, 1, 0]}
+                        },
+                    }
+                },
+                {"$addFields": {"summary": True}},
+            ],
+        }
+    },
+]
+
+STREAM_FLUSH_BYTES = 64 * 1024
+# In-process token -> user cache so repeat requests skip the Mongo token lookup.
+TOKEN_CACHE_TTL_SECONDS = 30.0
+TOKEN_CACHE_MAX_ENTRIES = 1024
+token_cache: Dict[str, Tuple[float, Dict]] = {}
+token_invalidated_at: Dict[str, float] = {}
+token_cache_lock = threading.Lock()
+# lastSeen is telemetry; queue it per user and write it in periodic batches.
+LAST_SEEN_FLUSH_SECONDS = 5.0
+pending_last_seen: Dict[object, int] = {}
+pending_last_seen_lock = threading.Lock()
+EVENTS_MAX = 2000
+EVENTS_MAX_BYTES = 2_000_000
+
+
+def ensure_events_collection() -> None:
+    # Capped collection lets Mongo trim old events itself instead of per-insert housekeeping.
+    if not events_col.options().get("capped"):
+        if "events" in db.list_collection_names():
+            migrate_events_to_capped()
+        else:
+            try:
+                db.create_collection("events", capped=True, size=EVENTS_MAX_BYTES, max=EVENTS_MAX)
+            except (CollectionInvalid, OperationFailure):
+                # A concurrent record_event auto-created a plain collection first; convert it.
+                if not events_col.options().get("capped"):
+                    migrate_events_to_capped()
+    # Admin log reads newest-first, so index timestamp descending.
+    try:
+        events_col.drop_index("timestamp_1")
+    except PyMongoError:
+        pass
+    events_col.create_index([("timestamp", DESCENDING)])
+
+
+def migrate_events_to_capped() -> None:
+    # Copy the most recent events of an existing uncapped log into a capped replacement.
+    db.drop_collection("events_capped")
+    staging = db.create_collection("events_capped", capped=True, size=EVENTS_MAX_BYTES, max=EVENTS_MAX)
+    recent = list(events_col.find({}, {"_id": 0}).sort("timestamp", -1).limit(EVENTS_MAX))
+    if recent:
+        staging.insert_many(list(reversed(recent)))
+    staging.rename("events", dropTarget=True)
+
+
+ensure_events_collection()
 
 # Indexes for quick lookups and uniqueness
 users_col.create_index([("name", ASCENDING)], unique=True)
@@ -60,16 +183,32 @@ users_col.create_index(
     partialFilterExpression={"token": {"$exists": True}},
 )
 apps_col.create_index([("id", ASCENDING)], unique=True)
-apps_col.create_index([("owner", ASCENDING)])
-events_col.create_index([("timestamp", ASCENDING)])
-
-APPLICATIONS_ROUTE = re.compile(r"^/api/applications/?$")
-APPLICATION_ROUTE_WITH_ID = re.compile(r"^/api/applications/(?P<id>\\d+)/?$")
-SEED_ROUTE = re.compile(r"^/api/seed/?$")
-AUTH_LOGIN_ROUTE = re.compile(r"^/api/auth/login/?$")
-ADMIN_USERS_ROUTE = re.compile(r"^/api/admin/users/?$")
-ADMIN_EVENTS_ROUTE = re.compile(r"^/api/admin/events/?$")
-ADMIN_CLEAR_EVENTS_ROUTE = re.compile(r"^/api/admin/events/clear/?$")
+# Owner listings sort by newest id; the compound index also serves owner-only filters.
+try:
+    apps_col.drop_index("owner_1")
+except PyMongoError:
+    pass
+apps_col.create_index([("owner", ASCENDING), ("id", DESCENDING)])
+
+APPLICATIONS_ROUTE = "applications"
+APPLICATION_ITEM_ROUTE = "application_item"
+SEED_ROUTE = "seed"
+AUTH_LOGIN_ROUTE = "auth_login"
+ADMIN_USERS_ROUTE = "admin_users"
+ADMIN_EVENTS_ROUTE = "admin_events"
+ADMIN_CLEAR_EVENTS_ROUTE = "admin_clear_events"
+
+# Fixed paths resolve with a dict lookup; only item routes need the regex.
+STATIC_ROUTES = {
+    "/api/applications": APPLICATIONS_ROUTE,
+    "/api/seed": SEED_ROUTE,
+    "/api/auth/login": AUTH_LOGIN_ROUTE,
+    "/api/admin/users": ADMIN_USERS_ROUTE,
+    "/api/admin/events": ADMIN_EVENTS_ROUTE,
+    "/api/admin/events/clear": ADMIN_CLEAR_EVENTS_ROUTE,
+}
+# Ids are bounded to 18 ASCII digits so they always fit a BSON int64.
+APPLICATION_ROUTE_WITH_ID = re.compile(r"^/api/applications/(?P<id>[0-9]{1,18})$")
 
 
 def parse_path(path: str) -> Tuple[str, Dict[str, str]]:
@@ -78,6 +217,22 @@ def parse_path(path: str) -> Tuple[str, Dict[str, str]]:
     return parsed.path, params
 
 
+def resolve_route(path: str) -> Tuple[Optional[str], Optional[int]]:
+    if path.endswith("/"):
+        path = path[:-1]
+    route = STATIC_ROUTES.get(path)
+    if route:
+        return route, None
+    match = APPLICATION_ROUTE_WITH_ID.match(path)
+    if match:
+        return APPLICATION_ITEM_ROUTE, int(match.group("id"))
+    return None, None
+
+
+def now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
 def clean_doc(doc: Optional[Dict]) -> Optional[Dict]:
     if not doc:
         return None
@@ -87,19 +242,42 @@ def clean_doc(doc: Optional[Dict]) -> Optional[Dict]:
 
 
 def next_app_id() -> int:
+    return next_app_id_batch(1)[0]
+
+
+def next_app_id_batch(count: int) -> range:
+    # Reserve `count` consecutive ids with a single counter increment.
     doc = counters_col.find_one_and_update(
         {"_id": "applications"},
-        {"$inc": {"seq": 1}},
+        {"$inc": {"seq": count}},
         upsert=True,
         return_document=ReturnDocument.AFTER,
     )
-    return int(doc["seq"])
+    last = int(doc["seq"])
+    return range(last - count + 1, last + 1)
 
 
 def hash_pin(pin: str) -> str:
+    digest = hashlib.pbkdf2_hmac(
+        "sha256", pin.encode("utf-8"), PIN_SALT.encode("utf-8"), PIN_HASH_ITERATIONS, dklen=32
+    )
+    return f"{PIN_HASH_PREFIX}{digest.hex()}"
+
+
+def legacy_hash_pin(pin: str) -> str:
+    # Single-round SHA-256 used before PBKDF2; kept so existing PINs still verify.
     return hashlib.sha256(f"{PIN_SALT}{pin}".encode("utf-8")).hexdigest()
 
 
+def is_legacy_pin_hash(pin_hash: str) -> bool:
+    return not pin_hash.startswith(PIN_HASH_PREFIX)
+
+
+def verify_pin(pin: str, pin_hash: str) -> bool:
+    candidate = legacy_hash_pin(pin) if is_legacy_pin_hash(pin_hash) else hash_pin(pin)
+    return secrets.compare_digest(candidate, pin_hash)
+
+
 def user_payload(user: Dict, include_token: bool = False) -> Dict:
     payload = {
         "name": user.get("name", ""),
@@ -124,32 +302,132 @@ def find_user_by_name(name: str) -> Optional[Dict]:
 
 
 def find_user_by_token(token: str) -> Optional[Dict]:
-    return users_col.find_one({"token": token})
+    return users_col.find_one({"token": token}, AUTH_USER_PROJECTION)
+
+
+def cached_user_for_token(token: str) -> Optional[Dict]:
+    with token_cache_lock:
+        entry = token_cache.get(token)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+
+def cache_user_token(token: str, user: Dict, fetched_at: float) -> None:
+    now = time.monotonic()
+    with token_cache_lock:
+        # Skip users invalidated while this lookup was in flight; the token may be revoked.
+        if token_invalidated_at.get(user.get("name"), 0.0) >= fetched_at:
+            return
+        if len(token_cache) >= TOKEN_CACHE_MAX_ENTRIES:
+            for stale in [key for key, (expires, _) in token_cache.items() if expires <= now]:
+                del token_cache[stale]
+            while len(token_cache) >= TOKEN_CACHE_MAX_ENTRIES:
+                del token_cache[min(token_cache, key=lambda key: token_cache[key][0])]
+        token_cache[token] = (now + TOKEN_CACHE_TTL_SECONDS, user)
+
+
+def invalidate_user_tokens(name: str) -> None:
+    # Called whenever a user's token is replaced or revoked.
+    with token_cache_lock:
+        now = time.monotonic()
+        # Marks older than the TTL can no longer affect an in-flight lookup.
+        for stale in [key for key, at in token_invalidated_at.items() if at <= now - TOKEN_CACHE_TTL_SECONDS]:
+            del token_invalidated_at[stale]
+        token_invalidated_at[name] = now
+        for token in [key for key, (_, user) in token_cache.items() if user.get("name") == name]:
+            del token_cache[token]
+
+
+def lookup_user_by_token(token: str, now: int) -> Optional[Dict]:
+    user = cached_user_for_token(token)
+    if not user:
+        fetched_at = time.monotonic()
+        user = find_user_by_token(token)
+        if not user:
+            return None
+        cache_user_token(token, user, fetched_at)
+    mark_last_seen(user["_id"], now)
+    return user
+
+
+def mark_last_seen(user_id: object, now: int) -> None:
+    with pending_last_seen_lock:
+        pending_last_seen[user_id] = now
+
+
+def flush_last_seen() -> None:
+    with pending_last_seen_lock:
+        snapshot = dict(pending_last_seen)
+        pending_last_seen.clear()
+    if not snapshot:
+        return
+    # $max so a queued timestamp never rolls back a newer lastSeen written by login.
+    users_col_fast.bulk_write(
+        [UpdateOne({"_id": user_id}, {"$max": {"lastSeen": ts}}) for user_id, ts in snapshot.items()],
+        ordered=False,
+    )
+
+
+def last_seen_flusher(stop: threading.Event) -> None:
+    while not stop.wait(LAST_SEEN_FLUSH_SECONDS):
+        try:
+            flush_last_seen()
+        except PyMongoError as err:
+            print("lastSeen flush failed:", err)
 
 
 def record_event(event: Dict) -> None:
-    events_col.insert_one({**event, "timestamp": int(time.time() * 1000)})
-    # Keep only the most recent 2000 events
-    count = events_col.count_documents({})
-    if count > 2000:
-        oldest_to_keep = list(
-            events_col.find({}, {"timestamp": 1}).sort("timestamp", -1).skip(2000).limit(1)
-        )
-        if oldest_to_keep:
-            cutoff = oldest_to_keep[0]["timestamp"]
-            events_col.delete_many({"timestamp": {"$lt": cutoff}})
+    # events is a capped collection, so Mongo drops the oldest entries past EVENTS_MAX.
+    events_col_fast.insert_one({**event, "timestamp": now_ms()})
+
+
+def date_header() -> bytes:
+    # The only per-response header besides Content-Length.
+    return b"Date: %s\r\n" % formatdate(usegmt=True).encode("ascii")
+
+
+def json_headers(status: int, length: Optional[int]) -> bytes:
+    head = STATUS_LINES[status] + date_header() + JSON_HEADERS
+    if length is not None:
+        head += b"Content-Length: %d\r\n" % length
+    return head + b"\r\n"
 
 
 def json_response(handler: BaseHTTPRequestHandler, status: int, payload: Dict) -> None:
-    body = json.dumps(payload).encode("utf-8")
-    handler.send_response(status)
-    handler.send_header("Content-Type", "application/json")
-    handler.send_header("Access-Control-Allow-Origin", "*")
-    handler.send_header("Access-Control-Allow-Methods", "GET,POST,PUT,DELETE,OPTIONS")
-    handler.send_header("Access-Control-Allow-Headers", "Content-Type, X-Admin-Token, X-User-Token")
-    handler.send_header("Content-Length", str(len(body)))
-    handler.end_headers()
-    handler.wfile.write(body)
+    body = orjson.dumps(payload)
+    # Status line, headers and body go out in a single write.
+    handler.wfile.write(b"".join((json_headers(status, len(body)), body)))
+
+
+def stream_json_array(handler: BaseHTTPRequestHandler, key: str, docs: Iterable[Dict]) -> None:
+    # Serialize `{key: [...]}` one document at a time instead of building the whole list.
+    docs = iter(docs)
+    # Nothing is written until the first flush, so errors before then propagate and the
+    # caller can still send a proper error response.
+    first = next(docs, None)
+    # No Content-Length: the body is delimited by closing the connection.
+    handler.close_connection = True
+    buffer = bytearray(json_headers(200, None))
+    buffer += b"{" + orjson.dumps(key) + b":["
+    started = False
+    try:
+        if first is not None:
+            buffer += orjson.dumps(first)
+            for doc in docs:
+                buffer += b","
+                buffer += orjson.dumps(doc)
+                if len(buffer) >= STREAM_FLUSH_BYTES:
+                    handler.wfile.write(buffer)
+                    buffer.clear()
+                    started = True
+        buffer += b"]}"
+        handler.wfile.write(buffer)
+    except Exception as err:  # noqa: BLE001
+        if not started:
+            raise
+        # Headers are already out; leave the body truncated so the client fails to parse it.
+        print("Aborted streamed response:", err)
 
 
 def parse_json(handler: BaseHTTPRequestHandler) -> Tuple[Optional[Dict], Optional[str]]:
@@ -162,19 +440,23 @@ def parse_json(handler: BaseHTTPRequestHandler) -> Tuple[Optional[Dict], Optiona
     if not raw:
         return {}, None
     try:
-        return json.loads(raw.decode("utf-8")), None
-    except json.JSONDecodeError as exc:
+        return orjson.loads(raw), None
+    except orjson.JSONDecodeError as exc:
         return None, f"Invalid JSON: {exc}"
 
 
 class AppHandler(BaseHTTPRequestHandler):
+    protocol_version = HTTP_VERSION
+
     def log_message(self, fmt: str, *args) -> None:
         # Quieter logs; override to reduce noise.
         return
 
     def is_admin(self) -> bool:
-        token = self.headers.get("X-Admin-Token", "")
-        return bool(ADMIN_TOKEN) and token == ADMIN_TOKEN
+        if not ADMIN_TOKEN_BYTES:
+            return False
+        token = self.headers.get("X-Admin-Token", "").encode("utf-8")
+        return secrets.compare_digest(ADMIN_TOKEN_BYTES, token)
 
     def require_admin(self) -> bool:
         if not self.is_admin():
@@ -188,65 +470,58 @@ class AppHandler(BaseHTTPRequestHandler):
             json_response(self, 401, {"error": "User token required"})
             return None
         try:
-            user = find_user_by_token(token)
+            user = lookup_user_by_token(token, now_ms())
         except PyMongoError as err:
             respond_db_error(self, err)
             return None
         if not user:
             json_response(self, 401, {"error": "User token invalid"})
             return None
-        now = int(time.time() * 1000)
-        users_col.update_one({"_id": user["_id"]}, {"$set": {"lastSeen": now}})
-        user["lastSeen"] = now
         return user
 
     def do_OPTIONS(self) -> None:  # noqa: N802
-        self.send_response(204)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "GET,POST,PUT,DELETE,OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type, X-Admin-Token, X-User-Token")
-        self.end_headers()
+        self.wfile.write(STATUS_LINES[204] + date_header() + OPTIONS_HEADERS)
 
     def do_GET(self) -> None:  # noqa: N802
         try:
             path, params = parse_path(self.path)
-            if APPLICATIONS_ROUTE.match(path):
+            route, _ = resolve_route(path)
+            if route == APPLICATIONS_ROUTE:
                 user = self.require_user()
                 if not user:
                     return
                 owner = user.get("name")
-                items = [clean_doc(item) for item in apps_col.find({"owner": owner}).sort("id", -1)]
-                json_response(self, 200, {"items": items})
+                cursor = apps_col.find({"owner": owner}, APPLICATION_PROJECTION).sort("id", -1)
+                stream_json_array(self, "items", cursor)
                 return
 
-            if ADMIN_USERS_ROUTE.match(path):
+            if route == ADMIN_USERS_ROUTE:
                 if not self.require_admin():
                     return
                 try:
-                    counts: Dict[str, int] = {}
-                    for doc in apps_col.aggregate(
-                        [{"$group": {"_id": {"$ifNull": ["$owner", ""]}, "total": {"$sum": 1}}}]
-                    ):
-                        counts[doc["_id"]] = doc["total"]
+                    summary: Dict = {}
                     users_payload = []
-                    for user in users_col.find({}):
-                        payload = user_payload(user, include_token=False)
-                        payload["totalApplications"] = counts.get(user.get("name", ""), 0)
+                    for doc in users_col.aggregate(ADMIN_USERS_PIPELINE):
+                        if doc.get("summary"):
+                            summary = doc
+                            continue
+                        payload = user_payload(doc, include_token=False)
+                        payload["totalApplications"] = doc["totalApplications"]
                         users_payload.append(payload)
                     json_response(
                         self,
                         200,
                         {
                             "users": users_payload,
-                            "unassignedApplications": counts.get("", 0),
-                            "totalApplications": sum(counts.values()),
+                            "unassignedApplications": summary.get("unassignedApplications", 0),
+                            "totalApplications": summary.get("totalApplications", 0),
                         },
                     )
                 except PyMongoError as err:
                     respond_db_error(self, err)
                 return
 
-            if ADMIN_EVENTS_ROUTE.match(path):
+            if route == ADMIN_EVENTS_ROUTE:
                 if not self.require_admin():
                     return
                 try:
@@ -254,13 +529,13 @@ class AppHandler(BaseHTTPRequestHandler):
                 except ValueError:
                     limit = 1000
                 try:
-                    events = [clean_doc(evt) for evt in events_col.find({}).sort("timestamp", -1).limit(limit)]
-                    json_response(self, 200, {"events": events})
+                    cursor = events_col.find({}, ADMIN_EVENT_PROJECTION).sort("timestamp", -1).limit(limit)
+                    stream_json_array(self, "events", cursor)
                 except PyMongoError as err:
                     respond_db_error(self, err)
                 return
 
-            if ADMIN_CLEAR_EVENTS_ROUTE.match(path):
+            if route == ADMIN_CLEAR_EVENTS_ROUTE:
                 if not self.require_admin():
                     return
                 json_response(self, 404, {"error": "Use DELETE to clear events"})
@@ -274,7 +549,8 @@ class AppHandler(BaseHTTPRequestHandler):
     def do_POST(self) -> None:  # noqa: N802
         try:
             path, params = parse_path(self.path)
-            if ADMIN_USERS_ROUTE.match(path):
+            route, _ = resolve_route(path)
+            if route == ADMIN_USERS_ROUTE:
                 if not self.require_admin():
                     return
                 payload, err = parse_json(self)
@@ -287,7 +563,7 @@ class AppHandler(BaseHTTPRequestHandler):
                 if not name:
                     json_response(self, 400, {"error": "name is required"})
                     return
-                now = int(time.time() * 1000)
+                now = now_ms()
                 try:
                     user = find_user_by_name(name)
                     if user:
@@ -306,8 +582,13 @@ class AppHandler(BaseHTTPRequestHandler):
                         if unset_fields:
                             update_doc["$unset"] = unset_fields
                         if update_doc:
-                            users_col.update_one({"_id": user["_id"]}, update_doc)
-                        user = users_col.find_one({"_id": user["_id"]})
+                            user = users_col.find_one_and_update(
+                                {"_id": user["_id"]},
+                                update_doc,
+                                return_document=ReturnDocument.AFTER,
+                            )
+                        if unset_fields:
+                            invalidate_user_tokens(name)
                     else:
                         if not pin:
                             json_response(self, 400, {"error": "pin is required for new users"})
@@ -328,7 +609,7 @@ class AppHandler(BaseHTTPRequestHandler):
                     respond_db_error(self, db_err)
                 return
 
-            if AUTH_LOGIN_ROUTE.match(path):
+            if route == AUTH_LOGIN_ROUTE:
                 payload, err = parse_json(self)
                 if payload is None:
                     json_response(self, 400, {"error": err or "Invalid payload"})
@@ -339,7 +620,7 @@ class AppHandler(BaseHTTPRequestHandler):
                 if not name or not pin:
                     json_response(self, 400, {"error": "name and pin are required"})
                     return
-                now = int(time.time() * 1000)
+                now = now_ms()
                 try:
                     user = find_user_by_name(name)
                     if not user:
@@ -348,31 +629,33 @@ class AppHandler(BaseHTTPRequestHandler):
                     if not user.get("pinHash"):
                         json_response(self, 403, {"error": "User not configured. Admin must set a PIN."})
                         return
-                    if hash_pin(pin) != user.get("pinHash"):
+                    if not verify_pin(pin, user["pinHash"]):
                         json_response(self, 403, {"error": "Invalid credentials"})
                         return
-                    if location:
-                        users_col.update_one({"_id": user["_id"]}, {"$set": {"location": location}})
                     token = secrets.token_hex(24)
-                    users_col.update_one(
+                    login_updates = {
+                        "token": token,
+                        "tokenIssuedAt": now,
+                        "lastLogin": now,
+                        "lastSeen": now,
+                    }
+                    if location:
+                        login_updates["location"] = location
+                    if is_legacy_pin_hash(user["pinHash"]):
+                        login_updates["pinHash"] = hash_pin(pin)
+                    user = users_col.find_one_and_update(
                         {"_id": user["_id"]},
-                        {
-                            "$set": {
-                                "token": token,
-                                "tokenIssuedAt": now,
-                                "lastLogin": now,
-                                "lastSeen": now,
-                            }
-                        },
+                        {"$set": login_updates},
+                        return_document=ReturnDocument.AFTER,
                     )
-                    user = users_col.find_one({"_id": user["_id"]})
+                    invalidate_user_tokens(name)
                     record_event({"type": "login", "owner": name, "ip": self.client_address[0]})
                     json_response(self, 200, user_payload(user, include_token=True))
                 except PyMongoError as db_err:
                     respond_db_error(self, db_err)
                 return
 
-            if APPLICATIONS_ROUTE.match(path):
+            if route == APPLICATIONS_ROUTE:
                 user = self.require_user()
                 if not user:
                     return
@@ -392,14 +675,14 @@ class AppHandler(BaseHTTPRequestHandler):
                     "location": payload.get("location", "").strip(),
                     "notes": payload.get("notes", "").strip(),
                     "owner": owner,
-                    "createdAt": payload.get("createdAt") or int(time.time() * 1000),
+                    "createdAt": payload.get("createdAt") or now_ms(),
                 }
                 apps_col.insert_one(item)
                 record_event({"type": "create", "owner": owner, "id": item_id, "ip": self.client_address[0]})
                 json_response(self, 201, clean_doc(item))
                 return
 
-            if SEED_ROUTE.match(path):
+            if route == SEED_ROUTE:
                 user = self.require_user()
                 if not user:
                     return
@@ -423,8 +706,8 @@ class AppHandler(BaseHTTPRequestHandler):
     def do_PUT(self) -> None:  # noqa: N802
         try:
             path, params = parse_path(self.path)
-            match = APPLICATION_ROUTE_WITH_ID.match(path)
-            if not match:
+            route, item_id = resolve_route(path)
+            if route != APPLICATION_ITEM_ROUTE:
                 return self.not_found()
 
             user = self.require_user()
@@ -436,10 +719,10 @@ class AppHandler(BaseHTTPRequestHandler):
                 return
 
             owner = user.get("name")
-            item_id = int(match.group("id"))
             updated = apps_col.find_one_and_update(
                 {"id": item_id, "owner": owner},
                 {"$set": {**payload, "id": item_id, "owner": owner}},
+                projection=APPLICATION_PROJECTION,
                 return_document=ReturnDocument.AFTER,
             )
 
@@ -448,7 +731,7 @@ class AppHandler(BaseHTTPRequestHandler):
                 return
 
             record_event({"type": "update", "owner": owner, "id": item_id, "ip": self.client_address[0]})
-            json_response(self, 200, clean_doc(updated))
+            json_response(self, 200, updated)
         except Exception as err:  # noqa: BLE001
             print("Unexpected PUT error:", err)
             json_response(self, 500, {"error": "Unexpected server error", "details": str(err)})
@@ -456,11 +739,11 @@ class AppHandler(BaseHTTPRequestHandler):
     def do_DELETE(self) -> None:  # noqa: N802
         try:
             path, params = parse_path(self.path)
-            match = APPLICATION_ROUTE_WITH_ID.match(path)
-            if not match and not ADMIN_USERS_ROUTE.match(path) and not ADMIN_CLEAR_EVENTS_ROUTE.match(path):
+            route, item_id = resolve_route(path)
+            if route not in (APPLICATION_ITEM_ROUTE, ADMIN_USERS_ROUTE, ADMIN_CLEAR_EVENTS_ROUTE):
                 return self.not_found()
 
-            if ADMIN_USERS_ROUTE.match(path):
+            if route == ADMIN_USERS_ROUTE:
                 if not self.require_admin():
                     return
                 name = (params.get("name") or "").strip()
@@ -473,6 +756,7 @@ class AppHandler(BaseHTTPRequestHandler):
                         json_response(self, 404, {"error": "User not found"})
                         return
                     users_col.delete_one({"_id": user["_id"]})
+                    invalidate_user_tokens(name)
                     apps_col.delete_many({"owner": name})
                     record_event({"type": "admin_user_delete", "owner": name, "ip": self.client_address[0]})
                     json_response(self, 204, {})
@@ -480,11 +764,13 @@ class AppHandler(BaseHTTPRequestHandler):
                     respond_db_error(self, db_err)
                 return
 
-            if ADMIN_CLEAR_EVENTS_ROUTE.match(path):
+            if route == ADMIN_CLEAR_EVENTS_ROUTE:
                 if not self.require_admin():
                     return
                 try:
-                    events_col.delete_many({})
+                    # Capped collections don't support deletes; drop and recreate instead.
+                    events_col.drop()
+                    ensure_events_collection()
                     json_response(self, 200, {"status": "cleared"})
                 except PyMongoError as db_err:
                     respond_db_error(self, db_err)
@@ -494,7 +780,6 @@ class AppHandler(BaseHTTPRequestHandler):
             if not user:
                 return
             owner = user.get("name")
-            item_id = int(match.group("id"))
             result = apps_col.delete_one({"id": item_id, "owner": owner})
             if result.deleted_count == 0:
                 json_response(self, 404, {"error": "Application not found"})
@@ -541,15 +826,18 @@ def seed_examples(owner: str) -> List[Dict]:
         },
     ]
     items: List[Dict] = []
-    now = int(time.time() * 1000)
-    for index, entry in enumerate(examples):
-        item_id = next_app_id()
+    now = now_ms()
+    item_ids = next_app_id_batch(len(examples))
+    for index, (entry, item_id) in enumerate(zip(examples, item_ids)):
         items.append({**entry, "id": item_id, "owner": owner, "createdAt": now - index * 3600 * 1000})
     return items
 
 
 def run(host: str = "127.0.0.1", port: int = 8000) -> None:
-    server = HTTPServer((host, port), AppHandler)
+    # One thread per connection so slow Mongo round-trips don't block other clients.
+    server = ThreadingHTTPServer((host, port), AppHandler)
+    stop_flusher = threading.Event()
+    threading.Thread(target=last_seen_flusher, args=(stop_flusher,), daemon=True).start()
     print(f"Backend running at http://{host}:{port}")
     print("Endpoints: POST /api/auth/login, GET/POST /api/applications, PUT/DELETE /api/applications/<id>, POST /api/seed")
     try:
@@ -558,6 +846,11 @@ def run(host: str = "127.0.0.1", port: int = 8000) -> None:
         print("\\nShutting down...")
     finally:
         server.server_close()
+        stop_flusher.set()
+        try:
+            flush_last_seen()
+        except PyMongoError as err:
+            print("lastSeen flush failed:", err)
 
 
 if __name__ == "__main__":